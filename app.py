@@ -167,7 +167,12 @@ def calculate_payment_cycles(collections, year, month):
     # Process each collection
     for coll in monthly_collections:
         try:
-            day = int(coll.date.split('-')[2])
+            # Slice well-formed YYYY-MM-DD dates; anything else takes the
+            # old split path so it is bucketed or skipped exactly as before
+            if len(coll.date) == 10:
+                day = int(coll.date[-2:])
+            else:
+                day = int(coll.date.split('-')[2])
             
             # Determine which cycle
             if 1 <= day <= 15:
@@ -194,6 +199,16 @@ def calculate_payment_cycles(collections, year, month):
     
     return cycles
 
+def calculate_daily_totals(entries):
+    """Total liters, total amount and average fat of collections/sales in one pass"""
+    total_liters = total_amount = total_fat = 0
+    for e in entries:
+        total_liters += e.liters
+        total_amount += e.amount
+        total_fat += e.fat
+    avg_fat = total_fat / len(entries) if entries else 0
+    return total_liters, total_amount, avg_fat
+
 # ================== MODELS ==================
 class Supplier(db.Model):
     """People who supply milk TO us"""
@@ -518,9 +533,7 @@ def dashboard():
     
     # Get today's collections from suppliers
     today_collections = Collection.query.filter_by(date=today).all()
-    total_liters = sum(c.liters for c in today_collections)
-    total_amount = sum(c.amount for c in today_collections)
-    avg_fat = sum(c.fat for c in today_collections) / len(today_collections) if today_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_collections)
     
     return render_template('index.html', 
                          suppliers=suppliers, 
@@ -580,9 +593,7 @@ def add_collection_page():
     
     # Get today's collections for stats
     today_collections = Collection.query.filter_by(date=today).all()
-    total_liters = sum(c.liters for c in today_collections)
-    total_amount = sum(c.amount for c in today_collections)
-    avg_fat = sum(c.fat for c in today_collections) / len(today_collections) if today_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_collections)
 
     return render_template('add_collection_page.html', 
                          suppliers=suppliers, 
@@ -920,9 +931,7 @@ def sales():
     today_sales = Sale.query.filter_by(date=today).all()
     
     # Calculate statistics
-    total_liters = sum(s.liters for s in today_sales)
-    total_amount = sum(s.amount for s in today_sales)
-    avg_fat = sum(s.fat for s in today_sales) / len(today_sales) if today_sales else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_sales)
     
     return render_template('sales.html', 
                          customers=customers,
@@ -1032,9 +1041,7 @@ def daily():
     
     # Calculate statistics only for actual collections
     actual_collections = Collection.query.filter_by(date=req_date).all()
-    total_liters = sum(r.liters for r in actual_collections)
-    total_amount = sum(r.amount for r in actual_collections)
-    avg_fat = sum(r.fat for r in actual_collections) / len(actual_collections) if actual_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(actual_collections)
     
     return render_template('daily.html', 
                          rows=rows, 
@@ -1108,9 +1115,7 @@ def export_daily_pdf():
         collections = all_collections
     
     # Calculate totals for filtered collections
-    total_liters = sum(c.liters for c in collections)
-    total_amount = sum(c.amount for c in collections)
-    avg_fat = sum(c.fat for c in collections) / len(collections) if collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(collections)
     
     # Create PDF in landscape mode
     buf = io.BytesIO()
@@ -1326,9 +1331,7 @@ def daily_sales():
     rows = query.order_by(Sale.session, Sale.customer_id).all()
     
     # Calculate statistics
-    total_liters = sum(r.liters for r in rows)
-    total_amount = sum(r.amount for r in rows)
-    avg_fat = sum(r.fat for r in rows) / len(rows) if rows else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(rows)
     
     return render_template('daily_sales.html', 
                          rows=rows, 
@@ -7,7 +7,7 @@ from functools import wraps
 import math
 from sqlalchemy import or_
 from models import db, Supplier, Collection
-from utils import get_today_ist, get_ist_datetime, sort_by_id, find_rate, NEW_RATES_START_DATE
+from utils import get_today_ist, get_ist_datetime, sort_by_id, find_rate, NEW_RATES_START_DATE, calculate_daily_totals
 
 collection_bp = Blueprint('collections', __name__, url_prefix='/collections')
 
@@ -35,9 +35,7 @@ def add_collection_page():
     suppliers = sort_by_id(suppliers, 'supplier_id')
     
     today_collections = Collection.query.filter_by(date=today).all()
-    total_liters = sum(c.liters for c in today_collections)
-    total_amount = sum(c.amount for c in today_collections)
-    avg_fat = sum(c.fat for c in today_collections) / len(today_collections) if today_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_collections)
 
     return render_template('collections/add.html', 
                          suppliers=suppliers, 
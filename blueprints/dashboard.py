@@ -4,7 +4,7 @@ Dashboard Blueprint
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from models import db, Supplier, Customer, Collection, Sale
-from utils import get_today_ist, sort_by_id
+from utils import get_today_ist, sort_by_id, calculate_daily_totals
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -25,9 +25,7 @@ def home():
     
     # Get today's collections
     today_collections = Collection.query.filter_by(date=today).all()
-    total_liters = sum(c.liters for c in today_collections)
-    total_amount = sum(c.amount for c in today_collections)
-    avg_fat = sum(c.fat for c in today_collections) / len(today_collections) if today_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_collections)
     
     return render_template('dashboard/home.html', 
                          suppliers=suppliers, 
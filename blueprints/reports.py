@@ -8,7 +8,7 @@ from sqlalchemy import or_, func
 import io
 import csv
 from models import db, Supplier, Customer, Collection, Sale, Withdrawal
-from utils import get_today_ist, sort_by_id
+from utils import get_today_ist, sort_by_id, calculate_daily_totals
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
 
@@ -82,9 +82,7 @@ def daily():
     
     # Calculate statistics
     actual_collections = Collection.query.filter_by(date=req_date).all()
-    total_liters = sum(r.liters for r in actual_collections)
-    total_amount = sum(r.amount for r in actual_collections)
-    avg_fat = sum(r.fat for r in actual_collections) / len(actual_collections) if actual_collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(actual_collections)
     
     return render_template('reports/daily.html', 
                          rows=rows, 
@@ -109,9 +107,7 @@ def daily_sales():
     rows = query.order_by(Sale.session, Sale.customer_id).all()
     
     # Calculate statistics
-    total_liters = sum(r.liters for r in rows)
-    total_amount = sum(r.amount for r in rows)
-    avg_fat = sum(r.fat for r in rows) / len(rows) if rows else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(rows)
     
     return render_template('reports/daily_sales.html', 
                          rows=rows, 
@@ -358,9 +354,7 @@ def export_daily_pdf():
         collections = all_collections
     
     # Calculate totals for all sessions
-    total_liters = sum(c.liters for c in collections)
-    total_amount = sum(c.amount for c in collections)
-    avg_fat = sum(c.fat for c in collections) / len(collections) if collections else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(collections)
     
     # Create PDF in landscape mode
     buf = io.BytesIO()
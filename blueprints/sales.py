@@ -6,7 +6,7 @@ from flask_login import login_required, current_user
 from functools import wraps
 import math
 from models import db, Customer, Sale
-from utils import get_today_ist, sort_by_id, find_rate, NEW_RATES_START_DATE
+from utils import get_today_ist, sort_by_id, find_rate, NEW_RATES_START_DATE, calculate_daily_totals
 
 sales_bp = Blueprint('sales', __name__, url_prefix='/sales')
 
@@ -35,9 +35,7 @@ def view_sales():
     today = get_today_ist()
     today_sales = Sale.query.filter_by(date=today).all()
     
-    total_liters = sum(s.liters for s in today_sales)
-    total_amount = sum(s.amount for s in today_sales)
-    avg_fat = sum(s.fat for s in today_sales) / len(today_sales) if today_sales else 0
+    total_liters, total_amount, avg_fat = calculate_daily_totals(today_sales)
     
     return render_template('sales/list.html', 
                          customers=customers,
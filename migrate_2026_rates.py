@@ -2,140 +2,264 @@
 """
 ONE-TIME script to update buffalo milk rates for February 2026 onwards.
 Run this after updating app.py
+
+The script is resumable: while a run is in progress the last processed id
+of each table is kept in a small migration_state table, so an interrupted
+run continues after it. The mark is cleared once a table is fully scanned,
+so the next run (e.g. after the rate chart changed) scans everything again.
+Pass --restart to discard the progress of an interrupted run.
 """
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import app, db, Collection, Sale, BUFFALO_RATE_CHART
-import math
+from sqlalchemy import case, cast, func, or_, text, Integer
+from functools import lru_cache
 
-def migrate_february_2026_rates():
-    """Update all buffalo milk records from February 2026 onwards"""
-    with app.app_context():
-        print("=" * 70)
-        print("MIGRATION: Updating buffalo milk rates for February 2026 onwards")
-        print("=" * 70)
-        
-        # Update COLLECTIONS (buffalo milk only, from Feb 2026)
-        collections = Collection.query.filter(
-            Collection.date >= '2026-02-01',
-            Collection.milk_type == 'buffalo'
+# Print a progress line every N updated records
+PROGRESS_EVERY = 500
+# Records fetched, written and committed per batch
+CHUNK_SIZE = 10000
+
+# migration_state keys holding the last processed id per table
+STATE_KEYS = {
+    Collection: 'buffalo_2026_last_id',
+    Sale: 'buffalo_2026_sales_last_id',
+}
+
+@lru_cache(maxsize=None)
+def fat_key(fat):
+    """Rate chart key for a fat reading (only a few hundred distinct values)"""
+    return round(fat * 10) / 10.0
+
+def chart_rate(model):
+    """SQL expression giving the current chart rate for a row's fat (NULL if off-chart)"""
+    # Keyed on round(fat * 10) as an integer; a CASE keeps this portable
+    # between SQLite and PostgreSQL, unlike a join against VALUES.
+    return case(
+        {int(round(k * 10)): v for k, v in BUFFALO_RATE_CHART.items()},
+        value=cast(func.round(model.fat * 10), Integer)
+    )
+
+def needs_check(model):
+    """SQL condition for rows that may have an outdated rate
+
+    SQL ROUND() and Python round() can disagree on exact .5 ties (e.g.
+    fat 6.25), so tied rows are always fetched and fat_key() decides,
+    exactly as the per-row Python check always has.
+    """
+    fat10 = model.fat * 10
+    return or_(
+        model.rate_per_liter != chart_rate(model),
+        func.abs(func.round(fat10) - fat10) == 0.5
+    )
+
+# ================== MIGRATION STATE ==================
+def ensure_state_table():
+    """Create the migration_state table if it does not exist yet"""
+    db.session.execute(text(
+        "CREATE TABLE IF NOT EXISTS migration_state (key TEXT PRIMARY KEY, value INTEGER)"
+    ))
+    db.session.commit()
+
+def get_last_id(key):
+    """Last processed id stored under key (0 when never run)"""
+    row = db.session.execute(
+        text("SELECT value FROM migration_state WHERE key = :key"), {'key': key}
+    ).first()
+    return row[0] if row else 0
+
+def set_last_id(key, value):
+    """Store the last processed id under key (not committed)"""
+    db.session.execute(text(
+        "INSERT INTO migration_state (key, value) VALUES (:key, :value) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+    ), {'key': key, 'value': value})
+
+def clear_last_id(key):
+    """Drop the mark stored under key once its table is fully scanned"""
+    db.session.execute(text("DELETE FROM migration_state WHERE key = :key"), {'key': key})
+    db.session.commit()
+
+def reset_state():
+    """Forget all stored progress so the next run scans everything"""
+    for key in STATE_KEYS.values():
+        clear_last_id(key)
+
+# ================== MIGRATION ==================
+def describe_owner(row):
+    """Supplier/customer line for the verbose report"""
+    if isinstance(row, Collection):
+        return f"  Supplier: {row.supplier.supplier_id} - {row.supplier.name}"
+    return f"  Customer: {row.customer.cust_id} - {row.customer.name}"
+
+def migrate_table(model, label, dry_run, limit, verbose, details):
+    """Fix outdated buffalo rates in one table, CHUNK_SIZE records at a time
+
+    Dry runs neither read nor write the stored mark and always scan from
+    the first record.
+
+    Returns (updated_count, total_difference, resumed_after_id).
+    """
+    action = "Would update" if dry_run else "Updated"
+    state_key = STATE_KEYS[model]
+    last_id = 0 if dry_run else get_last_id(state_key)
+    resumed_after_id = last_id
+
+    # Only rows whose stored rate may differ from the chart are fetched
+    query = model.query.filter(
+        model.date >= '2026-02-01',
+        model.milk_type == 'buffalo',
+        needs_check(model)
+    )
+    total = query.filter(model.id > last_id).count()
+    to_scan = min(total, limit) if limit else total
+
+    resumed = f" (resuming after ID {last_id})" if last_id else ""
+    print(f"Found {total} buffalo milk {label} from Feb 2026 onwards to check{resumed}")
+    if to_scan < total:
+        print(f"Showing first {to_scan}")
+
+    updated_count = 0
+    total_difference = 0
+    remaining = to_scan
+
+    while remaining > 0:
+        rows = query.filter(model.id > last_id).order_by(model.id).limit(
+            min(CHUNK_SIZE, remaining)
         ).all()
-        
-        print(f"Found {len(collections)} buffalo milk collections from Feb 2026 onwards")
-        
-        updated_count = 0
-        total_difference = 0
-        
-        for coll in collections:
-            old_amount = coll.amount
-            old_rate = coll.rate_per_liter
-            
+        if not rows:
+            break
+        remaining -= len(rows)
+
+        updates = []
+        for row in rows:
+            old_amount = row.amount
+            old_rate = row.rate_per_liter
+
             # Find new rate from current chart
-            fat_key = round(coll.fat * 10) / 10.0
-            new_rate = BUFFALO_RATE_CHART.get(fat_key)
-            
+            new_rate = BUFFALO_RATE_CHART.get(fat_key(row.fat))
+
             if new_rate and new_rate != old_rate:
-                new_amount = math.floor(coll.liters * new_rate)
+                # liters and rates are never negative, so int() == floor()
+                new_amount = int(row.liters * new_rate)
                 difference = new_amount - old_amount
-                
-                # Update the record
-                coll.rate_per_liter = new_rate
-                coll.amount = new_amount
+
+                updates.append({'id': row.id, 'rate_per_liter': new_rate, 'amount': new_amount})
                 updated_count += 1
                 total_difference += difference
-                
-                print(f"✓ Updated Collection ID {coll.id}:")
-                print(f"  Supplier: {coll.supplier.supplier_id} - {coll.supplier.name}")
-                print(f"  Date: {coll.date}, Liters: {coll.liters}, Fat: {coll.fat}")
-                print(f"  Rate: ₹{old_rate} → ₹{new_rate}")
-                print(f"  Amount: ₹{old_amount} → ₹{new_amount}")
-                print(f"  Difference: ₹{difference}")
-                print("-" * 50)
-        
-        # Update SALES (buffalo milk only, from Feb 2026)
-        sales = Sale.query.filter(
-            Sale.date >= '2026-02-01',
-            Sale.milk_type == 'buffalo'
-        ).all()
-        
-        print(f"\nFound {len(sales)} buffalo milk sales from Feb 2026 onwards")
-        
-        sales_updated = 0
-        
-        for sale in sales:
-            old_amount = sale.amount
-            old_rate = sale.rate_per_liter
-            
-            fat_key = round(sale.fat * 10) / 10.0
-            new_rate = BUFFALO_RATE_CHART.get(fat_key)
-            
-            if new_rate and new_rate != old_rate:
-                new_amount = math.floor(sale.liters * new_rate)
-                difference = new_amount - old_amount
-                
-                sale.rate_per_liter = new_rate
-                sale.amount = new_amount
-                sales_updated += 1
-                total_difference += difference
-                
-                print(f"✓ Updated Sale ID {sale.id}:")
-                print(f"  Customer: {sale.customer.cust_id} - {sale.customer.name}")
-                print(f"  Date: {sale.date}, Liters: {sale.liters}, Fat: {sale.fat}")
-                print(f"  Rate: ₹{old_rate} → ₹{new_rate}")
-                print(f"  Amount: ₹{old_amount} → ₹{new_amount}")
-                print("-" * 50)
-        
-        # Commit all changes
-        if updated_count > 0 or sales_updated > 0:
+
+                if verbose:
+                    details.append(f"✓ {action} {model.__name__} ID {row.id}:")
+                    details.append(describe_owner(row))
+                    details.append(f"  Date: {row.date}, Liters: {row.liters}, Fat: {row.fat}")
+                    details.append(f"  Rate: ₹{old_rate} → ₹{new_rate}")
+                    details.append(f"  Amount: ₹{old_amount} → ₹{new_amount}")
+                    details.append(f"  Difference: ₹{difference}")
+                    details.append("-" * 50)
+
+                if updated_count % PROGRESS_EVERY == 0:
+                    print(f"... {updated_count}/{to_scan} {label} changed", flush=True)
+
+        last_id = rows[-1].id
+        if not dry_run:
+            # Each chunk is committed together with its high-water mark
+            db.session.bulk_update_mappings(model, updates)
+            set_last_id(state_key, last_id)
             db.session.commit()
+
+    # Table fully scanned: the mark only exists to resume an interrupted run
+    if not dry_run and to_scan == total:
+        clear_last_id(state_key)
+
+    return updated_count, total_difference, resumed_after_id
+
+def migrate_february_2026_rates(dry_run=False, limit=None, verbose=False, restart=False):
+    """Update all buffalo milk records from February 2026 onwards
+
+    With dry_run set nothing is written; the changes are only reported.
+    limit caps the number of records fetched (used by the preview).
+    restart discards the progress of an interrupted run and scans from the
+    first record (dry runs always do).
+
+    Per-record details are only collected when verbose is set, and are
+    written out in one go at the end instead of line by line.
+    """
+    details = []
+    with app.app_context():
+        print("=" * 70)
+        if dry_run:
+            print("PREVIEW: Buffalo milk rate changes for February 2026 onwards")
+        else:
+            print("MIGRATION: Updating buffalo milk rates for February 2026 onwards")
+        print("=" * 70)
+
+        if not dry_run:
+            ensure_state_table()
+            if restart:
+                reset_state()
+
+        # Update COLLECTIONS (buffalo milk only, from Feb 2026)
+        updated_count, collections_difference, collections_resumed = migrate_table(
+            Collection, 'collections', dry_run, limit, verbose, details
+        )
+
+        print()
+
+        # Update SALES (buffalo milk only, from Feb 2026)
+        sales_updated, sales_difference, sales_resumed = migrate_table(
+            Sale, 'sales', dry_run, limit, verbose, details
+        )
+
+        total_difference = collections_difference + sales_difference
+
+        if details:
+            sys.stdout.write("\n".join(details) + "\n")
+
+        if not (updated_count or sales_updated):
+            if collections_resumed or sales_resumed:
+                # Records before the mark were not re-checked in this run
+                print("\nℹ️ No remaining records needed updating after resuming the interrupted run.")
+            else:
+                print("\nℹ️ No records needed updating. Buffalo milk rates are already correct.")
+        elif dry_run:
+            print("\n" + "=" * 70)
+            print("PREVIEW ONLY - nothing was written")
+            print(f"   {updated_count} collections would be updated")
+            print(f"   {sales_updated} sales would be updated")
+            print(f"   Total amount difference: ₹{total_difference}")
+            print("=" * 70)
+        else:
             print("\n" + "=" * 70)
             print("✅ MIGRATION COMPLETED SUCCESSFULLY!")
             print(f"   Updated {updated_count} collections")
             print(f"   Updated {sales_updated} sales")
             print(f"   Total amount difference: ₹{total_difference}")
             print("=" * 70)
-        else:
-            print("\nℹ️ No records needed updating. Buffalo milk rates are already correct.")
-        
+
         return updated_count + sales_updated
 
 if __name__ == '__main__':
+    verbose = '--verbose' in sys.argv
+    restart = '--restart' in sys.argv
+
     print("\n⚠️  WARNING: This will update buffalo milk rates for February 2026 onwards.")
     print("   Cow milk rates will NOT be changed.")
     print("   Make sure you have a database backup!")
+    print("   (pass --verbose to list every updated record,")
+    print("    --restart to ignore progress saved by an interrupted run)")
     print("\nOptions:")
     print("1. Run migration (update all records)")
     print("2. Preview changes without updating")
     print("3. Exit")
-    
+
     choice = input("\nEnter choice (1, 2, or 3): ").strip()
-    
+
     if choice == '1':
-        migrate_february_2026_rates()
+        migrate_february_2026_rates(verbose=verbose, restart=restart)
     elif choice == '2':
-        # Preview mode
-        with app.app_context():
-            collections = Collection.query.filter(
-                Collection.date >= '2026-02-01',
-                Collection.milk_type == 'buffalo'
-            ).limit(10).all()
-            
-            print("\nPreview of changes (first 10 records):")
-            print("-" * 70)
-            
-            for coll in collections:
-                fat_key = round(coll.fat * 10) / 10.0
-                new_rate = BUFFALO_RATE_CHART.get(fat_key)
-                
-                if new_rate:
-                    new_amount = math.floor(coll.liters * new_rate)
-                    print(f"Supplier: {coll.supplier.supplier_id} - {coll.supplier.name}")
-                    print(f"Date: {coll.date}, Liters: {coll.liters}, Fat: {coll.fat}")
-                    print(f"Current Rate: ₹{coll.rate_per_liter} → New Rate: ₹{new_rate}")
-                    print(f"Current Amount: ₹{coll.amount} → New Amount: ₹{new_amount}")
-                    print(f"Difference: ₹{new_amount - coll.amount}")
-                    print("-" * 50)
+        # Preview mode: same code path, first 10 records, nothing written
+        migrate_february_2026_rates(dry_run=True, limit=10, verbose=True)
     else:
-        print("Migration cancelled.")
\ No newline at end of file
+        print("Migration cancelled.")
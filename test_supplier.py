@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import sys
 sys.path.append('.')
 
@@ -17,12 +18,14 @@ with app.app_context():
         print(f"Supplier.supplier_id: {supplier.supplier_id}")
         
         # Test 2: Try to get collections
-        collections = Collection.query.filter_by(supplier_id=supplier.id).all()
-        print(f"Collections found: {len(collections)}")
+        n = Collection.query.filter_by(supplier_id=supplier.id).count()
+        print(f"Collections found: {n}")
         
         # Test 3: Try with supplier.supplier_id (this is wrong)
-        try:
-            wrong_collections = Collection.query.filter_by(supplier_id=supplier.supplier_id).all()
-            print(f"Wrong query result: {len(wrong_collections)}")
-        except Exception as e:
-            print(f"Error with wrong query: {e}")
+        # Only run when explicitly asked: RUN_NEGATIVE_TESTS=1
+        if os.environ.get('RUN_NEGATIVE_TESTS'):
+            try:
+                n_wrong = Collection.query.filter_by(supplier_id=supplier.supplier_id).count()
+                print(f"Wrong query result: {n_wrong}")
+            except Exception as e:
+                print(f"Error with wrong query: {e}")
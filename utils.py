@@ -99,7 +99,12 @@ def calculate_payment_cycles(collections, year, month):
     
     for coll in monthly_collections:
         try:
-            day = int(coll.date.split('-')[2])
+            # Slice well-formed YYYY-MM-DD dates; anything else takes the
+            # old split path so it is bucketed or skipped exactly as before
+            if len(coll.date) == 10:
+                day = int(coll.date[-2:])
+            else:
+                day = int(coll.date.split('-')[2])
             
             if 1 <= day <= 15:
                 cycle = cycles['cycle_1']
@@ -123,6 +128,16 @@ def calculate_payment_cycles(collections, year, month):
     
     return cycles
 
+def calculate_daily_totals(entries):
+    """Total liters, total amount and average fat of collections/sales in one pass"""
+    total_liters = total_amount = total_fat = 0
+    for e in entries:
+        total_liters += e.liters
+        total_amount += e.amount
+        total_fat += e.fat
+    avg_fat = total_fat / len(entries) if entries else 0
+    return total_liters, total_amount, avg_fat
+
 # ================== SORTING ==================
 def sort_by_id(items, id_field='supplier_id'):
     """Sort by ID as numbers"""